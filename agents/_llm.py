@@ -0,0 +1,44 @@
+"""
+agents/_llm.py
+Shared litellm call settings used by intent.py, dialogue.py and planning.py.
+
+For Ollama models (model starts with "ollama/" or "ollama_chat/") every
+request carries keep_alive so the server keeps the weights loaded between
+voice commands, and prewarm() loads the model at startup so the first
+command after boot doesn't pay the load cost.  Given an agent's system
+prompt, prewarm() also evaluates it so Ollama's prompt cache already holds
+that prefix when the first real request arrives.  Cloud models need neither.
+"""
+
+import os
+
+import litellm
+
+OLLAMA_API_BASE   = os.getenv("OLLAMA_API_BASE",   "http://localhost:11434")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+
+def is_ollama(model: str) -> bool:
+    return model.startswith(("ollama/", "ollama_chat/"))
+
+
+def completion_kwargs(model: str) -> dict:
+    """Extra litellm kwargs for `model` (empty for cloud backends)."""
+    if not is_ollama(model):
+        return {}
+    return {"api_base": OLLAMA_API_BASE, "keep_alive": OLLAMA_KEEP_ALIVE}
+
+
+async def prewarm(model: str, system: str | None = None) -> None:
+    """Load an Ollama model (and prefill `system`) with a one-token request."""
+    if not is_ollama(model):
+        return
+    messages = [{"role": "user", "content": "hi"}]
+    if system:
+        messages.insert(0, {"role": "system", "content": system})
+    await litellm.acompletion(
+        model=model,
+        messages=messages,
+        max_tokens=1,
+        **completion_kwargs(model),
+    )
@@ -1,7 +1,8 @@
 """
 Audio Capture Agent
 ===================
-Single blocking loop, two-state FSM, one PyAudio stream.
+Single blocking loop, two-state FSM, one PyAudio stream (opened once,
+started for each listen() and stopped again when it returns).
 
   IDLE
     Read one chunk from the mic (1 s).
@@ -12,7 +13,7 @@ Single blocking loop, two-state FSM, one PyAudio stream.
 
   LISTENING
     Read chunks and accumulate into a speech buffer.
-    When the buffer is full → return the tensor and go back to IDLE.
+    When the buffer is full → return the float32 array and go back to IDLE.
 
 Using PyAudio (not sounddevice) keeps the audio format identical to the
 format used by SimpleWakeWords during enrolment/detection, eliminating
@@ -20,21 +21,24 @@ any conversion artefacts that were causing near-zero similarity.
 
 Usage:
     audio = await audio_capture.listen()   # blocks through wake word + speech
-    text  = await stt.transcribe(audio)
+    text  = await stt.transcribe(audio)    # np.ndarray, no torch round-trip
 """
 
 import asyncio
+import atexit
 import collections
+import concurrent.futures
+import logging
+import math
 import os
-import struct
 import sys
 import time
 
 import state_bus
 
+import numpy as np
 import pyaudio
 import torch
-import torch.nn.functional as F
 
 _SW_DIR = os.path.join(os.path.dirname(__file__), '..', 'simple-wake-word')
 sys.path.insert(0, _SW_DIR)
@@ -50,6 +54,38 @@ from SimpleWakeWords import (
 _PROJECT_ROOT   = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 _EMBEDDING_FILE = os.path.join(_PROJECT_ROOT, "wake_word_embedding.pt")
 
+log = logging.getLogger(__name__)
+
+# PyAudio paInt16 samples and their scale to [-1, 1], built once instead of
+# per chunk in _read().
+_PCM16      = np.dtype("<i2")
+_PCM16_FULL = np.float32(1.0 / 32768.0)
+
+
+def _realtime_priority(prio: int) -> bool:
+    """Put the calling thread under SCHED_FIFO at `prio`; False if refused.
+
+    Linux only; needs CAP_SYS_NICE or an rtprio limit (e.g. the `audio`
+    group in /etc/security/limits.d), otherwise the thread keeps normal
+    priority and we say so.
+    """
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(prio))
+        return True
+    except (AttributeError, OSError) as e:
+        log.warning("[audio] SCHED_FIFO priority %d not applied: %s", prio, e)
+        return False
+
+
+def _normal_priority() -> None:
+    """Return the calling thread to SCHED_OTHER after _realtime_priority()."""
+    os.sched_setscheduler(0, os.SCHED_OTHER, os.sched_param(0))
+
+
+def _peak(x: np.ndarray) -> float:
+    """Peak |sample| without materialising np.abs(x)."""
+    return float(max(x.max(), -x.min()))
+
 
 class AudioCaptureAgent:
     """Wake word detection + speech capture in a single read loop."""
@@ -66,8 +102,8 @@ class AudioCaptureAgent:
                if device_index is not None
                else self._pa.get_default_input_device_info())
 
-        print(f"[audio] mic [{dev['index']}] '{dev['name']}' "
-              f"@ {self.RATE} Hz  chunk={self.CHUNK}")
+        log.info("[audio] mic [%d] '%s' @ %d Hz  chunk=%d",
+                 dev["index"], dev["name"], self.RATE, self.CHUNK)
 
         self._stream = self._pa.open(
             format=pyaudio.paInt16,
@@ -76,16 +112,32 @@ class AudioCaptureAgent:
             input=True,
             input_device_index=device_index,
             frames_per_buffer=self.CHUNK,
+            start=False,        # only runs inside listen(); see _capture()
         )
+        # One persistent worker owns the stream and the embedding model, so
+        # every listen() runs on the same thread instead of whichever
+        # default-executor worker (shared with Whisper/TTS) is free.
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="audio",
+        )
+        # AUDIO_RT_PRIORITY (1-99) optionally raises that worker to SCHED_FIFO
+        # while it is blocked in stream.read(), so the mic is serviced on time
+        # while the rest of the brain is busy.  See _read().
+        self._rt = max(0, int(os.getenv("AUDIO_RT_PRIORITY", "0") or 0))
+        atexit.register(self.close)
 
         if os.path.exists(_EMBEDDING_FILE):
             self._target = torch.load(
                 _EMBEDDING_FILE, weights_only=True, map_location="cpu"
             )
-            print(f"[audio] loaded wake word embedding from {_EMBEDDING_FILE}")
+            log.info("[audio] loaded wake word embedding from %s", _EMBEDDING_FILE)
         else:
-            print(f"[audio] no embedding found – enrolling '{wake_word}' ...")
+            log.info("[audio] no embedding found – enrolling '%s' ...", wake_word)
             self._target = enroll_wake_word(wake_word)
+        # Flat, unit-length float32 copy for the per-chunk similarity in
+        # _sim(); the target never changes, so it is normalised once here.
+        target = self._target.detach().cpu().numpy().ravel().astype(np.float32)
+        self._target_hat = target / max(float(np.linalg.norm(target)), 1e-8)
 
         self._speech_chunks = speech_seconds  # CHUNK = 1 s, so chunks == seconds
 
@@ -94,90 +146,150 @@ class AudioCaptureAgent:
         # similarity is ~0.2-0.22 when the wake word is spoken correctly.
         self._threshold = float(os.getenv("WAKE_WORD_THRESHOLD", "0.2"))
         set_threshold(self._threshold)
-        print(f"[audio] threshold={self._threshold:.2f}  "
-              f"speech_window={speech_seconds}s")
 
-    # ── Internal helpers ──────────────────────────────────────────────────────
+        # Optional energy gate: windows whose chunks are all below this RMS
+        # (a quiet room) skip the embedding model entirely.  0 disables it.
+        self._vad_ms = float(os.getenv("WAKE_VAD_RMS", "0")) ** 2
+        log.info("[audio] threshold=%.2f  speech_window=%ds",
+                 self._threshold, speech_seconds)
 
-    def _read(self) -> torch.Tensor:
-        """Read one chunk from PyAudio, return float32 tensor [-1, 1]."""
-        raw     = self._stream.read(self.CHUNK, exception_on_overflow=False)
-        samples = struct.unpack(f"{self.CHUNK}h", raw)
-        return torch.tensor(samples, dtype=torch.float32) / 32768.0
+        # Run one full-window inference now so lazy weight loading and the
+        # first-call kernel/allocator setup don't land on the first real chunk.
+        self._sim(np.zeros(2 * self.CHUNK, dtype=np.float32))
 
-    def _sim(self, chunk: torch.Tensor) -> float:
+    # ── Internal helpers ──────────────────────────────────────────────────────
+
+    def _read(self, out: np.ndarray) -> np.ndarray:
+        """Read one chunk from PyAudio into `out` as float32 samples [-1, 1]."""
+        # SCHED_FIFO only around the read: the embedding in _sim() runs next
+        # on this thread, and the OpenMP team torch spawns from it would
+        # inherit a real-time policy and could starve Whisper and the loop.
+        rt = self._rt > 0 and _realtime_priority(self._rt)
+        if self._rt and not rt:
+            self._rt = 0        # refused (no CAP_SYS_NICE); don't retry
+        try:
+            raw = self._stream.read(self.CHUNK, exception_on_overflow=False)
+        finally:
+            if rt:
+                _normal_priority()
+        i16 = np.frombuffer(raw, dtype=_PCM16)
+        np.multiply(i16, _PCM16_FULL, out=out, casting="unsafe")
+        return out
+
+    @torch.inference_mode()
+    def _sim(self, chunk: np.ndarray) -> float:
         t0  = time.perf_counter()
-        emb = _audio_to_embedding(chunk)
-        sim = F.cosine_similarity(
-            emb.unsqueeze(0), self._target.unsqueeze(0)
-        ).item()
+        emb = _audio_to_embedding(torch.from_numpy(chunk))
+        # Plain numpy cosine: two 1-D vectors don't need torch's broadcasting
+        # and tensor allocation for a single scalar.
+        emb = emb.detach().cpu().numpy().ravel()
+        sim = (float(np.dot(emb, self._target_hat))
+               / max(math.sqrt(float(np.dot(emb, emb))), 1e-8))
         elapsed_ms = (time.perf_counter() - t0) * 1000
         if elapsed_ms > 200:   # only log when it's suspiciously slow
-            print(f"[perf] embed       {elapsed_ms:.0f}ms  (>{200}ms threshold)")
+            log.warning("[perf] embed       %.0fms  (>200ms threshold)", elapsed_ms)
         return sim
 
-    # ── FSM loop (runs in a thread via asyncio.to_thread) ─────────────────────
+    # ── FSM loop (runs on the single audio worker thread) ─────────────────────
 
-    def _loop(self) -> torch.Tensor:
+    def _loop(self) -> np.ndarray:
         state  = "IDLE"
-        speech = []
         n      = 0
+        # Speech is read chunk by chunk into one utterance-sized buffer, so
+        # the capture is returned as a view instead of concatenated at the end.
+        speech = np.empty(self._speech_chunks * self.CHUNK, dtype=np.float32)
+        got    = 0                                                  # chunks captured
         # 2-chunk (2 s) sliding window so "didgeridoo" is never cut across
-        # a block boundary.  PyAudio still reads in 1 s chunks; we just cat
-        # the last two before scoring.
-        win_buf: collections.deque = collections.deque(maxlen=2)
+        # a block boundary.  PyAudio still reads in 1 s chunks; before each
+        # read the previous chunk shifts down and the new one lands in the
+        # top half of this preallocated buffer, so scoring allocates nothing.
+        window = np.zeros(2 * self.CHUNK, dtype=np.float32)
+        filled = 0                                                  # chunks in window
+        win_ms: collections.deque = collections.deque(maxlen=2)     # mean squares
 
         while True:
-            chunk = self._read()
-            n    += 1
+            # Each chunk is converted straight into where it is kept: the top
+            # half of the (shifted) wake-word window, or its slot in speech.
+            if state == "IDLE":
+                window[:self.CHUNK] = window[self.CHUNK:]
+                chunk = self._read(window[self.CHUNK:])
+            else:
+                chunk = self._read(speech[got * self.CHUNK:(got + 1) * self.CHUNK])
+            n += 1
 
             if state == "IDLE":
                 # Manual trigger from dashboard button
                 if state_bus.manual_trigger.is_set():
                     state_bus.manual_trigger.clear()
-                    print("[audio] *** MANUAL TRIGGER ***")
+                    log.info("[audio] *** MANUAL TRIGGER ***")
                     state  = "LISTENING"
-                    speech = []
+                    # A STOP pressed while idle is stale; drop it at the switch.
+                    state_bus.stop_listening.clear()
                     continue
 
-                win_buf.append(chunk)
-                window = torch.cat(list(win_buf))   # 1 s until buf fills, then 2 s
-                sim = self._sim(window)
+                filled = min(filled + 1, 2)
+                win_ms.append(float(np.dot(chunk, chunk)) / len(chunk))
+                if max(win_ms) < self._vad_ms:
+                    sim = 0.0                       # silence: nothing to score
+                else:
+                    # 1 s until the window fills, then 2 s
+                    sim = self._sim(window[(2 - filled) * self.CHUNK:])
                 state_bus.publish_audio_chunk(
-                    sim=sim, state="IDLE", peak=float(chunk.abs().max())
+                    sim=sim, state="IDLE", peak=_peak(chunk)
                 )
-                if n % 3 == 0:                          # log every ~3 s
-                    print(f"[audio] IDLE  sim={sim:.3f}  threshold={self._threshold:.2f}")
+                # Similarity trace for tuning WAKE_WORD_THRESHOLD; LOG_LEVEL=DEBUG
+                # shows it every ~3 s, otherwise nothing is formatted or written.
+                if n % 3 == 0 and log.isEnabledFor(logging.DEBUG):
+                    log.debug("[audio] IDLE  sim=%.3f  threshold=%.2f",
+                              sim, self._threshold)
 
                 if sim > self._threshold:
-                    print(f"[audio] *** WAKE WORD (sim={sim:.3f}) ***")
+                    log.info("[audio] *** WAKE WORD (sim=%.3f) ***", sim)
                     state  = "LISTENING"
-                    speech = []
+                    state_bus.stop_listening.clear()
 
             elif state == "LISTENING":
-                speech.append(chunk)
+                got += 1
                 state_bus.publish_audio_chunk(
-                    sim=1.0, state="LISTENING", peak=float(chunk.abs().max())
+                    sim=1.0, state="LISTENING", peak=_peak(chunk)
                 )
-                print(f"[audio] LISTENING {len(speech)}s recorded  "
-                      f"(press STOP or wait {self._speech_chunks}s max)")
+                log.debug("[audio] LISTENING %ds recorded  (press STOP or wait %ds max)",
+                          got, self._speech_chunks)
 
                 stopped_early = state_bus.stop_listening.is_set()
                 if stopped_early:
                     state_bus.stop_listening.clear()
-                    print("[audio] LISTENING stopped by user")
+                    log.info("[audio] LISTENING stopped by user")
 
-                if stopped_early or len(speech) >= self._speech_chunks:
-                    result = torch.cat(speech)
-                    print(f"[audio] captured {result.shape[0]} samples  "
-                          f"peak={result.abs().max():.4f}")
+                if stopped_early or got >= self._speech_chunks:
+                    result = speech[:got * self.CHUNK]
+                    peak   = _peak(result)
+                    log.info("[audio] captured %d samples  peak=%.4f",
+                             result.shape[0], peak)
                     state_bus.publish_audio_chunk(
-                        sim=1.0, state="PROCESSING", peak=float(result.abs().max())
+                        sim=1.0, state="PROCESSING", peak=peak
                     )
                     return result
 
+    def _capture(self) -> np.ndarray:
+        # The stream is stopped between listens so audio recorded while the
+        # pipeline transcribes/thinks/speaks (including our own TTS) doesn't
+        # pile up in PortAudio's buffer and get scored on the next listen.
+        self._stream.start_stream()
+        try:
+            return self._loop()
+        finally:
+            self._stream.stop_stream()
+
     # ── Public API ────────────────────────────────────────────────────────────
 
-    async def listen(self) -> torch.Tensor:
-        """Block until wake word fires, then return the speech audio tensor."""
-        return await asyncio.to_thread(self._loop)
+    async def listen(self) -> np.ndarray:
+        """Block until wake word fires, then return the speech audio samples."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._capture)
+
+    def close(self):
+        """Release the mic stream and PortAudio (registered with atexit)."""
+        self._pool.shutdown(wait=False)
+        self._stream.close()
+        self._pa.terminate()
@@ -4,12 +4,14 @@ Generates a short spoken response for conversational commands.
 The reply is passed to the TTS agent so it should be plain prose - no markdown.
 
 Uses litellm so the backend is swappable via LLM_MODEL env var.
+litellm.acompletion keeps the call on the event loop, so it can overlap
+with other LLM round-trips instead of occupying a to_thread worker.
 """
 
-import asyncio
-
 import litellm
 
+from agents._llm import completion_kwargs, prewarm
+
 SYSTEM = """
 You are CHAOS, a small friendly wheeled robot.
 Reply in 1-2 short sentences. Plain text only - no bullet points or markdown.
@@ -19,17 +21,19 @@ You will be read aloud.
 
 class DialogueAgent:
     def __init__(self, model: str):
-        self.model = model
+        self.model   = model
+        self._kwargs = completion_kwargs(model)
+
+    async def prewarm(self):
+        await prewarm(self.model, SYSTEM)
 
-    def _respond(self, text: str) -> str:
-        response = litellm.completion(
+    async def respond(self, text: str) -> str:
+        response = await litellm.acompletion(
             model=self.model,
             messages=[
                 {"role": "system", "content": SYSTEM},
                 {"role": "user",   "content": text},
             ],
+            **self._kwargs,
         )
         return response.choices[0].message.content.strip()
-
-    async def respond(self, text: str) -> str:
-        return await asyncio.to_thread(self._respond, text)
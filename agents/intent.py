@@ -5,13 +5,19 @@ Asks an LLM to classify the transcribed command as either:
   "action"   - a physical task (movement, emotion, sensor query)
 
 Uses litellm so the backend is swappable via LLM_MODEL env var.
+The reply is constrained to the Intent schema (Ollama structured outputs /
+provider JSON schema), so the model can only emit {"type": ...}; the regex
+fallback in _parse is kept for backends that ignore the schema.
 """
 
-import asyncio
 import json
 import re
+from typing import Literal
 
 import litellm
+from pydantic import BaseModel, ValidationError
+
+from agents._llm import completion_kwargs, prewarm
 
 SYSTEM = """
 Classify this robot voice command into one of two types.
@@ -25,6 +31,10 @@ Use "action" for: movement, driving, turning, stopping, LED emotions, sensor que
 """.strip()
 
 
+class Intent(BaseModel):
+    type: Literal["dialogue", "action"]
+
+
 def _parse(content: str) -> dict:
     """Parse JSON from LLM response with fallbacks for messy output."""
     try:
@@ -42,18 +52,24 @@ def _parse(content: str) -> dict:
 
 class IntentAgent:
     def __init__(self, model: str):
-        self.model = model
+        self.model   = model
+        self._kwargs = completion_kwargs(model)
+
+    async def prewarm(self):
+        await prewarm(self.model, SYSTEM)
 
-    def _classify(self, text: str) -> dict:
-        response = litellm.completion(
+    async def classify(self, text: str) -> dict:
+        response = await litellm.acompletion(
             model=self.model,
             messages=[
                 {"role": "system", "content": SYSTEM},
                 {"role": "user",   "content": text},
             ],
-            response_format={"type": "json_object"},
+            response_format=Intent,
+            **self._kwargs,
         )
-        return _parse(response.choices[0].message.content)
-
-    async def classify(self, text: str) -> dict:
-        return await asyncio.to_thread(self._classify, text)
+        content = response.choices[0].message.content
+        try:
+            return Intent.model_validate_json(content).model_dump()
+        except ValidationError:
+            return _parse(content)
@@ -2,20 +2,22 @@
 Planning Agent  (Strands Agent + LiteLLM)
 
 Backed by whatever model LLM_MODEL points at.
-For Ollama models (model starts with "ollama/"), api_base is set automatically
-from OLLAMA_API_BASE env var (default: http://localhost:11434).
+For Ollama models (model starts with "ollama/"), api_base and keep_alive are
+set automatically from OLLAMA_API_BASE / OLLAMA_KEEP_ALIVE (see agents/_llm.py).
 For cloud models (gemini/, claude/, gpt-*) no extra config is needed beyond
 the provider's API key env var.
 """
 
-import asyncio
-import os
+import logging
 
 from strands import Agent
 from strands.models.litellm import LiteLLMModel
 
+from agents._llm import completion_kwargs
 from tools import drive_for, stop, set_emotion, get_sensors
 
+log = logging.getLogger(__name__)
+
 SYSTEM = """
 You are the motor controller for CHAOS, a small wheeled robot.
 When given a movement command, call the appropriate tools to execute it.
@@ -32,12 +34,9 @@ Guidelines:
 
 class PlanningAgent:
     def __init__(self, model: str):
-        client_args = {}
-        if model.startswith("ollama/"):
-            client_args["api_base"] = os.getenv(
-                "OLLAMA_API_BASE", "http://localhost:11434"
-            )
-        strands_model = LiteLLMModel(model_id=model, client_args=client_args)
+        strands_model = LiteLLMModel(
+            model_id=model, client_args=completion_kwargs(model)
+        )
         self._agent = Agent(
             model=strands_model,
             tools=[drive_for, stop, set_emotion, get_sensors],
@@ -45,6 +44,6 @@ class PlanningAgent:
         )
 
     async def plan(self, text: str) -> str:
-        print(f"[planning] {text!r}")
+        log.debug("[planning] %r", text)
         result = await self._agent.invoke_async(text)
         return str(result)
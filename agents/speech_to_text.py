@@ -1,26 +1,54 @@
 """
 Speech-to-Text Agent
-Transcribes a raw audio tensor to a string using openai-whisper.
+Transcribes a float32 16 kHz audio array to a string using openai-whisper.
 Runs in a thread pool executor because Whisper is CPU-bound.
 
-Uses openai-whisper (pure PyTorch) rather than faster-whisper because
-faster-whisper's ctranslate2 dependency lacks reliable ARM64/Jetson wheels.
+Uses openai-whisper (pure PyTorch) by default because faster-whisper's
+ctranslate2 dependency lacks reliable ARM64/Jetson wheels.  Where the wheels
+are available, set STT_BACKEND=faster-whisper to run CTranslate2 int8 with
+VAD filtering, which is several times faster on CPU (int8 weights with fp16
+compute on a CUDA GPU when CTranslate2 can see one).
 """
 
 import asyncio
+import logging
+import os
 
-import torch
-import whisper
+import numpy as np
+
+log = logging.getLogger(__name__)
 
 
 class SpeechToTextAgent:
     def __init__(self, model_size: str = "base"):
-        self._model = whisper.load_model(model_size)
-        print(f"[stt] loaded Whisper '{model_size}'")
+        self._backend = os.getenv("STT_BACKEND", "whisper").strip()
+        if self._backend == "faster-whisper":
+            import ctranslate2
+            from faster_whisper import WhisperModel
+            cuda = ctranslate2.get_cuda_device_count() > 0
+            self._model = WhisperModel(
+                model_size,
+                device="cuda" if cuda else "cpu",
+                compute_type="int8_float16" if cuda else "int8",
+                cpu_threads=int(os.getenv("OMP_NUM_THREADS", "0")), num_workers=1,
+            )
+        else:
+            import whisper
+            self._model = whisper.load_model(model_size)
+            # Half precision halves encoder/decoder traffic on a GPU (e.g. the
+            # Jetson); CPU kernels have no fp16 path, so stay fp32 there.
+            self._fp16 = self._model.device.type == "cuda"
+        log.info("[stt] loaded %s '%s'", self._backend, model_size)
 
-    def _transcribe(self, audio: torch.Tensor) -> str:
-        result = self._model.transcribe(audio.numpy(), fp16=False)
+    def _transcribe(self, audio: np.ndarray) -> str:
+        if self._backend == "faster-whisper":
+            segments, _ = self._model.transcribe(
+                audio, beam_size=1, vad_filter=True,
+                condition_on_previous_text=False, without_timestamps=True,
+            )
+            return "".join(seg.text for seg in segments).strip()
+        result = self._model.transcribe(audio, fp16=self._fp16)
         return result["text"].strip()
 
-    async def transcribe(self, audio: torch.Tensor) -> str:
+    async def transcribe(self, audio: np.ndarray) -> str:
         return await asyncio.to_thread(self._transcribe, audio)
@@ -1,9 +1,12 @@
 """
 Text-to-Speech Agent
-Speaks text aloud using Piper via subprocess with --output_raw.
+Speaks text aloud using an in-process PiperVoice, loaded once at startup so
+each utterance only pays for synthesis (no interpreter spawn or ONNX load).
+The raw PCM is streamed to the device sentence by sentence, resampled on the
+way when the speaker can't run at the voice's native rate.
 
-Running piper as a subprocess is the most version-agnostic approach and
-avoids any Python/ONNX API differences across piper-tts versions.
+Works with both piper-tts APIs: synthesize_stream_raw() (<= 1.2) and the
+AudioChunk iterator returned by synthesize() (>= 1.3).
 
 Voice: en_GB-jenny_dioco-medium  (British English, female, ~60 MB)
 Download via deploy.sh or manually:
@@ -15,17 +18,43 @@ Download via deploy.sh or manually:
 """
 
 import asyncio
-import json
+import logging
 import os
-import subprocess
+import threading
 from math import gcd
 
 import numpy as np
 import sounddevice as sd
+from numpy.lib.stride_tricks import sliding_window_view
+from piper import PiperVoice
 
 _PROJECT_ROOT  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 _DEFAULT_VOICE = os.path.join(_PROJECT_ROOT, "voices", "en_GB-jenny_dioco-medium.onnx")
 
+log = logging.getLogger(__name__)
+
+
+def _polyphase(x: np.ndarray, bank: np.ndarray, up: int, down: int,
+               j0: int, n: int) -> np.ndarray:
+    """Outputs j0 .. j0+n-1 of upsample-by-`up` → FIR → downsample-by-`down`.
+
+    `bank[p]` is the reversed sub-filter of polyphase branch p, so output j
+    is dot(bank[j*down % up], x[j*down//up - T + 1 : j*down//up + 1]).
+    Outputs j ≡ r (mod up) share a branch and step `down` input samples
+    apart, so each branch is one matmul over a strided sliding-window view.
+    """
+    T    = bank.shape[1]
+    last = ((j0 + n - 1) * down) // up
+    xpad = np.zeros(T - 1 + max(len(x), last + 1), dtype=np.float32)
+    xpad[T - 1:T - 1 + len(x)] = x
+    win  = sliding_window_view(xpad, T)
+    y    = np.empty(n, dtype=np.float32)
+    for r in range(min(up, n)):
+        k   = (j0 + r) * down
+        out = y[r::up]
+        np.matmul(win[k // up::down][:len(out)], bank[k % up], out=out)
+    return y
+
 
 class TextToSpeechAgent:
     def __init__(self):
@@ -33,54 +62,135 @@ class TextToSpeechAgent:
         _v        = os.getenv("PIPER_VOICE",          _DEFAULT_VOICE)
         _spk      = os.getenv("SPEAKER_DEVICE_INDEX", "").strip()
         _spk_rate = os.getenv("SPEAKER_SAMPLE_RATE",  "").strip()
+        _backend  = os.getenv("PIPER_BACKEND",        "cpu").strip().lower()
 
-        self._model  = os.path.abspath(_v)          # absolute path for subprocess
+        self._model  = os.path.abspath(_v)
         self._device = int(_spk)      if _spk      else None
         self._spk_rate = int(_spk_rate) if _spk_rate else None
 
-        # Read sample rate from the .onnx.json sidecar – no ONNX load needed
-        config_path = self._model + ".json"
-        with open(config_path) as f:
-            self._src_rate = json.load(f)["audio"]["sample_rate"]
-
-        print(f"[tts] voice={self._model}  src_rate={self._src_rate} Hz")
-        print(f"[tts] speaker device={self._device}  playback_rate={self._spk_rate}")
-
-    def _speak(self, text: str):
-        from scipy.signal import resample_poly
-
-        result = subprocess.run(
-            ["python3", "-m", "piper",
-             "--model",      self._model,
-             "--output_raw"],
-            input=text.encode("utf-8"),
-            capture_output=True,
+        # Reads the .onnx.json sidecar and builds the ONNX session once.
+        # PIPER_BACKEND=cuda asks onnxruntime for the CUDA execution provider
+        # (needs onnxruntime-gpu, e.g. the Jetson wheel); CPU stays as fallback.
+        self._voice    = PiperVoice.load(self._model, use_cuda=_backend == "cuda")
+        self._src_rate = self._voice.config.sample_rate
+
+        self._dst_rate = self._spk_rate or self._src_rate
+
+        # The voice and output stream are shared by every speak() call, each
+        # running on its own to_thread worker; one utterance at a time.
+        self._lock = threading.Lock()
+
+        # Piper's PCM goes to the speaker as it is produced, so playback
+        # starts after the first sentence instead of after the whole reply
+        # has been synthesised.  At the native rate the int16 bytes are
+        # written as-is; otherwise they are resampled block by block.
+        self._resample = self._dst_rate != self._src_rate
+        self._stream = sd.RawOutputStream(
+            samplerate=self._dst_rate, channels=1,
+            dtype="float32" if self._resample else "int16",
+            device=self._device,
         )
+        self._frame_bytes = 4 if self._resample else 2
+        if self._resample:
+            # Design the anti-aliasing filter once: the same Kaiser-windowed
+            # sinc (beta 5, unity DC gain) resample_poly would build on every
+            # call, with its gain (up) and the int16 → [-1, 1) scale folded
+            # in.  The zero pre-pad centres the output samples; the taps are
+            # then split into one reversed sub-filter per polyphase branch.
+            g          = gcd(self._src_rate, self._dst_rate)
+            self._up   = self._dst_rate // g
+            self._down = self._src_rate // g
+            max_rate   = max(self._up, self._down)
+            half_len   = 10 * max_rate
+            k          = np.arange(-half_len, half_len + 1)
+            taps       = np.sinc(k / max_rate) * np.kaiser(2 * half_len + 1, 5.0)
+            taps      *= self._up / taps.sum() / 32768.0
+            pre_pad    = self._down - half_len % self._down
+            self._ntaps = pre_pad + len(taps)
+            n_branch   = -(-self._ntaps // self._up)
+            padded     = np.zeros(n_branch * self._up)
+            padded[pre_pad:self._ntaps] = taps
+            self._bank = padded.reshape(n_branch, self._up).T[:, ::-1].astype(np.float32)
+            self._skip = (half_len + pre_pad) // self._down
+
+        log.info("[tts] voice=%s  src_rate=%s Hz  backend=%s",
+                 self._model, self._src_rate, _backend)
+        log.info("[tts] speaker device=%s  playback_rate=%s", self._device, self._spk_rate)
+
+    def _synthesize_raw(self, text: str):
+        """Yield int16 PCM bytes, one block per sentence."""
+        if hasattr(self._voice, "synthesize_stream_raw"):     # piper-tts <= 1.2
+            yield from self._voice.synthesize_stream_raw(text)
+        else:                                                  # piper-tts >= 1.3
+            for chunk in self._voice.synthesize(text):
+                yield chunk.audio_int16_bytes
+
+    def _resampled(self, blocks):
+        """Resample int16 PCM blocks to the speaker rate as float32 blocks.
+
+        Polyphase FIR on the int16 samples (the scale lives in the taps).
+        Each block is filtered together with just enough input
+        history that the output is identical to resample_poly over the whole
+        utterance; the history start stays a multiple of `down` so block
+        outputs line up with the one-shot output grid.
+        """
+        up, down, skip = self._up, self._down, self._skip
+        hist  = np.zeros(0, dtype=np.int16)
+        start = 0       # input index of hist[0]
+        n_in  = 0       # input samples seen so far
+        m     = 0       # output samples emitted so far
+
+        def filtered(m_end):
+            j0 = m + skip - start * up // down
+            return _polyphase(hist, self._bank, up, down, j0, m_end - m)
+
+        for block in blocks:
+            n_in += len(block) // 2
+            hist  = np.concatenate((hist, np.frombuffer(block, dtype=np.int16)))
+            m_end = (n_in * up - 1) // down + 1 - skip  # outputs needing no future input
+            if m_end > m:
+                yield filtered(m_end)
+                m     = m_end
+                first = max(0, ((m + skip) * down - self._ntaps + 1) // up)
+                first -= first % down
+                hist  = hist[first - start:]
+                start = first
+        m_end = -(-n_in * up // down)     # flush; the zero tail pads as resample_poly does
+        if m_end > m:
+            yield filtered(m_end)
+
+    def _play_stream(self, blocks) -> int:
+        """Write PCM blocks to the speaker as they arrive; returns samples."""
+        n = 0
+        self._stream.start()
+        try:
+            for block in blocks:
+                self._stream.write(block)
+                n += memoryview(block).nbytes // self._frame_bytes
+        finally:
+            self._stream.stop()     # returns once the buffered audio has played
+        return n
 
-        if not result.stdout:
-            # Filter out known harmless ONNX/GPU noise so real errors are visible
-            lines = result.stderr.decode(errors="replace").splitlines()
-            real  = [l for l in lines if "onnxruntime" not in l and "GPU" not in l]
-            print(f"[tts] piper produced no audio  rc={result.returncode}")
-            if real:
-                print("[tts] piper stderr:\n" + "\n".join(real))
+    def _speak(self, text: str):
+        try:
+            blocks = self._synthesize_raw(text)
+            if self._resample:
+                blocks = self._resampled(blocks)
+            n = self._play_stream(blocks)
+            if n:
+                log.debug("[tts] %d samples  %s→%s Hz  device=%s",
+                          n, self._src_rate, self._dst_rate, self._device)
+        except Exception as e:
+            log.warning("[tts] piper synthesis failed: %s", e)
             return
 
-        audio_f32 = np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
-        dst_rate   = self._spk_rate or self._src_rate
-
-        print(f"[tts] {len(audio_f32)} samples  {self._src_rate}→{dst_rate} Hz  "
-              f"device={self._device}  peak={audio_f32.max():.4f}")
-
-        if self._src_rate != dst_rate:
-            g         = gcd(self._src_rate, dst_rate)
-            audio_f32 = resample_poly(
-                audio_f32, dst_rate // g, self._src_rate // g
-            ).astype(np.float32)
+        if not n:
+            log.warning("[tts] piper produced no audio")
 
-        sd.play(audio_f32, samplerate=dst_rate, device=self._device)
-        sd.wait()
+    def _speak_locked(self, text: str):
+        with self._lock:
+            self._speak(text)
 
     async def speak(self, text: str):
-        print(f"[tts] {text!r}")
-        await asyncio.to_thread(self._speak, text)
+        log.info("[tts] %r", text)
+        await asyncio.to_thread(self._speak_locked, text)
@@ -7,7 +7,7 @@ Pipeline (runs in a loop forever):
     │
     ▼  AudioCaptureAgent  single PyAudio loop: IDLE→wake word→LISTENING→return
     │                     (wake word detection + speech capture in one agent)
-    ▼  SpeechToTextAgent  Whisper: audio tensor → text string
+    ▼  SpeechToTextAgent  Whisper: float32 audio array → text string
     │
     ▼  IntentAgent        Ollama: classify as "dialogue" or "action"
     │
@@ -27,6 +27,8 @@ Strands + Anthropic handles the action loop that needs reliable tool calling.
 """
 
 import asyncio
+import contextlib
+import logging
 import os
 import time
 
@@ -35,6 +37,27 @@ import time
 from dotenv import load_dotenv
 load_dotenv()
 
+# Cap the BLAS/OpenMP pools before torch / ctranslate2 are imported.  Whisper
+# and the wake-word model otherwise each size their pool to every core and
+# thrash against each other and the event loop on small boards.
+_threads = os.getenv("CPU_THREADS", str(max(1, (os.cpu_count() or 2) // 2)))
+for _var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+    os.environ.setdefault(_var, _threads)
+
+# torch's inter-op pool is process-wide and can only be sized before its first
+# parallel op, so it is fixed here, before the agents load models on worker
+# threads.  Intra-op threads follow OMP_NUM_THREADS above; the wake-word and
+# Whisper graphs are plain chains, so one inter-op thread is enough.
+import torch
+torch.set_num_interop_threads(1)
+
+# LOG_LEVEL=DEBUG shows the per-utterance / per-command detail lines; at the
+# default INFO they are skipped before any message formatting happens.
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(message)s"
+)
+logging.getLogger("httpx").setLevel(logging.WARNING)   # one line per LLM call
+
 import uvicorn
 import serial_reader
 import state_bus
@@ -50,15 +73,29 @@ SERIAL_PORT = os.getenv("SERIAL_PORT", "/dev/ttyACM0")
 WAKE_WORD   = os.getenv("WAKE_WORD",   "didgeridoo")
 LLM_MODEL   = os.getenv("LLM_MODEL",   "gemini/gemini-2.0-flash")
 
+log = logging.getLogger(__name__)
+
+
+async def _prewarm_llm(*agents, tag: str = "startup"):
+    try:
+        # Intent and the speculative dialogue reply open every command, so
+        # their system prompts are the ones worth having in the prompt cache.
+        await asyncio.gather(*(agent.prewarm() for agent in agents))
+    except Exception as e:
+        log.warning("[%s] LLM prewarm failed (Ollama not running?): %s", tag, e)
+
 
-async def startup(tts: TextToSpeechAgent):
+async def startup(tts: TextToSpeechAgent, intent: IntentAgent, dialogue: DialogueAgent):
     """Announce we're alive with an emotion + spoken greeting."""
     from tools.emotion import set_emotion
     try:
         set_emotion("happy")
     except Exception as e:
-        print(f"[startup] set_emotion failed (CAN not connected?): {e}")
-    await tts.speak("Hey there, good looking!")
+        log.warning("[startup] set_emotion failed (CAN not connected?): %s", e)
+    # Load the LLM while the greeting plays so the first command is warm.
+    await asyncio.gather(
+        tts.speak("Hey there, good looking!"), _prewarm_llm(intent, dialogue)
+    )
 
 
 def _ms(t0: float) -> str:
@@ -66,19 +103,20 @@ def _ms(t0: float) -> str:
 
 
 async def pipeline(audio_capture, stt, intent, dialogue, planning, tts):
+    reprime = None      # background prompt-cache re-prime from the last turn
     while True:
         # ── Idle + Capture ────────────────────────────────────────────────
         state_bus.pipeline_state.update({"phase": "idle", "ts": time.time()})
-        print("\n[idle] waiting for wake word ...")
+        log.info("\n[idle] waiting for wake word ...")
         t0 = time.perf_counter()
         audio = await audio_capture.listen()
-        print(f"[perf] listen      {_ms(t0)}")
+        log.info("[perf] listen      %s", _ms(t0))
 
         # ── Transcribe ────────────────────────────────────────────────────
         state_bus.pipeline_state.update({"phase": "transcribing", "ts": time.time()})
         t0 = time.perf_counter()
         text  = await stt.transcribe(audio)
-        print(f"[perf] stt         {_ms(t0)}  → {text!r}")
+        log.info("[perf] stt         %s  → %r", _ms(t0), text)
         state_bus.pipeline_state.update({"heard": text, "ts": time.time()})
 
         if not text:
@@ -86,36 +124,74 @@ async def pipeline(audio_capture, stt, intent, dialogue, planning, tts):
 
         # ── Think ─────────────────────────────────────────────────────────
         state_bus.pipeline_state.update({"phase": "thinking", "ts": time.time()})
+        # A re-prime still running by now (slow or reloading Ollama) would
+        # only compete with intent for the model; drop it and reap it.
+        if reprime is not None:
+            reprime.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await reprime
+            reprime = None
         t0 = time.perf_counter()
-        kind = await intent.classify(text)
-        print(f"[perf] intent      {_ms(t0)}  → {kind}")
-        state_bus.pipeline_state["intent"] = kind.get("type", "unknown")
-
-        if kind.get("type") == "dialogue":
-            t0 = time.perf_counter()
-            response = await dialogue.respond(text)
-            print(f"[perf] dialogue    {_ms(t0)}")
-        else:
-            t0 = time.perf_counter()
-            response = await planning.plan(text)
-            print(f"[perf] planning    {_ms(t0)}")
+        # Speculatively start the dialogue reply alongside intent so the
+        # common chat path doesn't pay for two LLM round-trips back to back.
+        # Dropped if the command turns out to be an action.
+        dialogue_task = asyncio.create_task(dialogue.respond(text))
+        consumed      = False
+        try:
+            kind = await intent.classify(text)
+            log.info("[perf] intent      %s  → %s", _ms(t0), kind)
+            state_bus.pipeline_state["intent"] = kind.get("type", "unknown")
+
+            if kind.get("type") == "dialogue":
+                consumed = True
+                response = await dialogue_task
+                log.info("[perf] dialogue    %s", _ms(t0))
+            else:
+                dialogue_task.cancel()
+                t0 = time.perf_counter()
+                response = await planning.plan(text)
+                log.info("[perf] planning    %s", _ms(t0))
+        finally:
+            # Unused speculation (action turn, or intent raised): cancel it and
+            # collect its outcome so a failed reply isn't logged as "Task
+            # exception was never retrieved".
+            if not consumed:
+                dialogue_task.cancel()
+                with contextlib.suppress(asyncio.CancelledError, Exception):
+                    await dialogue_task
 
         # ── Speak ─────────────────────────────────────────────────────────
         state_bus.pipeline_state.update({"phase": "speaking", "response": response, "ts": time.time()})
         t0 = time.perf_counter()
+        if kind.get("type") != "dialogue":
+            # Planning's prompt has displaced intent/dialogue from the LLM's
+            # prompt cache; re-prime them while the speaker is busy.  Left in
+            # the background so it never holds off the next listen().
+            reprime = asyncio.create_task(
+                _prewarm_llm(intent, dialogue, tag="reprime")
+            )
         await tts.speak(response)
-        print(f"[perf] tts         {_ms(t0)}")
+        log.info("[perf] tts         %s", _ms(t0))
+
+
+def _audio_agents():
+    # Both open PortAudio streams, and PortAudio's init/open calls aren't
+    # thread-safe, so the two device agents are built on one thread.
+    return AudioCaptureAgent(WAKE_WORD, speech_seconds=4), TextToSpeechAgent()
 
 
 async def main():
-    audio_capture = AudioCaptureAgent(WAKE_WORD, speech_seconds=4)
-    stt      = SpeechToTextAgent()
+    # Model loads are independent (wake word + Piper vs Whisper), so overlap
+    # them on worker threads; the LLM agents are cheap to build.
+    (audio_capture, tts), stt = await asyncio.gather(
+        asyncio.to_thread(_audio_agents),
+        asyncio.to_thread(SpeechToTextAgent),
+    )
     intent   = IntentAgent(model=LLM_MODEL)
     dialogue = DialogueAgent(model=LLM_MODEL)
     planning = PlanningAgent(model=LLM_MODEL)
-    tts      = TextToSpeechAgent()
 
-    await startup(tts)
+    await startup(tts, intent, dialogue)
 
     uv_config = uvicorn.Config(
         dashboard_app, host="0.0.0.0", port=8080,
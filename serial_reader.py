@@ -14,23 +14,73 @@ Serial protocol (chaos_hal.ino, 115200 baud, 10 Hz):
 """
 
 import asyncio
+import logging
 import math
 import os
 import queue
-import random
+
+import numpy as np
 
 STUB = os.getenv("STUB_HARDWARE", "0") == "1"
 
+log = logging.getLogger(__name__)
+
 # ── Outgoing command queue (thread-safe: tools write, async loop drains) ──────
 _cmd_q: queue.SimpleQueue = queue.SimpleQueue()
 
 
-def send_command(line: str) -> None:
-    """Send a serial command to the Arduino. Safe to call from any thread."""
-    if STUB:
-        print(f"[serial stub] {line}")
-        return
-    _cmd_q.put_nowait(line.rstrip("\n") + "\n")
+# Fixed commands, encoded once (see also tools/emotion.py).
+CMD_STOP = b"CMD,DRIVE,0,0\n"
+
+
+def drive_command(throttle: float, steering: float) -> bytes:
+    """Encode CMD,DRIVE for throttle/steering in [-1, 1] (int8 %, clamped ±100)."""
+    t = max(-100, min(100, int(throttle * 100)))
+    s = max(-100, min(100, int(steering * 100)))
+    return b"CMD,DRIVE,%d,%d\n" % (t, s)
+
+
+# send_command() is bound once for the mode we're in (as in tools/_can.py),
+# so each command skips the STUB test and the queue's global lookup.
+if STUB:
+    _stub_last: bytes | None = None
+
+    def send_command(line: str | bytes) -> None:
+        """Log a serial command instead of sending it (STUB_HARDWARE=1).
+
+        drive_for() repeats its command every 50 ms, so only a change of
+        command is logged at INFO; repeats go to DEBUG.
+        """
+        global _stub_last
+        if isinstance(line, str):
+            line = (line.rstrip("\n") + "\n").encode()
+        if line != _stub_last:
+            _stub_last = line
+            log.info("[serial stub] %s", line.decode().rstrip())
+        else:
+            log.debug("[serial stub] %s (repeat)", line.decode().rstrip())
+else:
+    def send_command(line: str | bytes, _put=_cmd_q.put_nowait) -> None:
+        """Send a serial command to the Arduino. Safe to call from any thread.
+
+        Accepts a str, or bytes already encoded with the trailing newline.
+        """
+        if isinstance(line, str):
+            line = (line.rstrip("\n") + "\n").encode()
+        _put(line)
+
+
+# Bumped by stop_motors().  A running drive_for() compares it on every resend
+# and gives up as soon as any stop (planner tool or dashboard) has been sent.
+stop_gen = 0
+
+
+def stop_motors() -> None:
+    """Send CMD_STOP and end any drive_for() resend loop in progress."""
+    global stop_gen
+    stop_gen += 1
+    send_command(CMD_STOP)
+
 
 robot_state = {
     "imu":     {},
@@ -40,48 +90,76 @@ robot_state = {
     "lidar":   [],
 }
 
+# The Arduino prints $IMU, $CMP, $ODO, $RPM back to back each tick.  Those
+# groups are staged here and published into robot_state together when $RPM
+# closes the tick, so readers on other threads (get_sensors, the dashboard)
+# never see one tick's IMU next to the previous tick's odometry.
+_tick: dict = {}
+
+
+# Fixed-layout telemetry lines: tag → (robot_state group, field names).
+# Values are floats in field order; a line with the wrong field count is
+# dropped.  $RPM is the last of these each tick and publishes it.
+_GROUPS = {
+    "$IMU": ("imu",     ("ax", "ay", "az", "gx", "gy", "gz")),
+    "$CMP": ("compass", ("x", "y", "z")),
+    "$ODO": ("odom",    ("linear", "angular")),
+    "$RPM": ("rpm",     ("left", "right")),
+}
 
-def parse_line(line: str):
-    parts = line.split(",")
-    tag   = parts[0]
 
-    if tag == "$IMU" and len(parts) == 7:
-        robot_state["imu"] = {
-            "ax": float(parts[1]), "ay": float(parts[2]), "az": float(parts[3]),
-            "gx": float(parts[4]), "gy": float(parts[5]), "gz": float(parts[6]),
-        }
-    elif tag == "$CMP" and len(parts) == 4:
-        robot_state["compass"] = {
-            "x": float(parts[1]), "y": float(parts[2]), "z": float(parts[3]),
-        }
-    elif tag == "$ODO" and len(parts) == 3:
-        robot_state["odom"] = {"linear": float(parts[1]), "angular": float(parts[2])}
-    elif tag == "$RPM" and len(parts) == 3:
-        robot_state["rpm"]  = {"left": float(parts[1]), "right": float(parts[2])}
-    elif tag == "$LDR" and len(parts) > 2:
-        robot_state["lidar"] = [int(d) for d in parts[2:]]
+def parse_line(line: str):
+    tag, _, rest = line.partition(",")
+    spec = _GROUPS.get(tag)
+
+    if spec is not None:
+        group, keys = spec
+        vals = rest.split(",")
+        if len(vals) == len(keys):
+            # dict/zip/map build the group from C, one float() per field.
+            _tick[group] = dict(zip(keys, map(float, vals)))
+            if group == "rpm":
+                # One C-level dict merge under the GIL: a reader sees all or none.
+                robot_state.update(_tick)
+                _tick.clear()
+    elif tag == "$LDR":
+        parts = rest.split(",")
+        if len(parts) > 1:
+            # map() runs int() from C without a per-element bytecode loop;
+            # ~360 readings per scan at 10 Hz.
+            robot_state["lidar"] = list(map(int, parts[1:]))
+
+
+def _stub_tables():
+    """Pregenerate the stub's noise and compass sweep (rounded Python floats)."""
+    rng   = np.random.default_rng()
+    n     = 1024
+    mean  = np.array([0.0,  0.0,  9.81, 0.0,  0.0,  0.0,  -400.0])
+    std   = np.array([0.05, 0.05, 0.02, 0.01, 0.01, 0.01,    2.0])
+    noise = mean + std * rng.standard_normal((n, 7))
+    noise[:, :3]  = noise[:, :3].round(3)    # accel
+    noise[:, 3:6] = noise[:, 3:6].round(2)   # gyro
+    noise[:, 6]   = noise[:, 6].round(1)     # compass z
+    # One full compass cycle (0.01 rad per tick ≈ 628 ticks) so it wraps cleanly.
+    phase = np.linspace(0.0, 2 * math.pi, round(2 * math.pi / 0.01), endpoint=False)
+    sweep = np.stack([200 + 10 * np.sin(phase), 50 + 10 * np.cos(phase)], axis=1)
+    return [tuple(r) for r in noise.tolist()], [tuple(r) for r in sweep.round(1).tolist()]
 
 
 async def _stub_run():
     """Emit fake sensor data at 10 Hz so the rest of the pipeline has numbers."""
-    print("[serial] STUB mode - generating fake sensor data at 10 Hz")
-    t = 0.0
+    log.info("[serial] STUB mode - generating fake sensor data at 10 Hz")
+    noise, sweep = _stub_tables()
+    i = 0
     while True:
         await asyncio.sleep(0.1)
-        t += 0.1
+        i += 1
+        ax, ay, az, gx, gy, gz, cz = noise[i % len(noise)]
+        cx, cy = sweep[i % len(sweep)]
         robot_state["imu"] = {
-            "ax": round(random.gauss(0.0,  0.05), 3),
-            "ay": round(random.gauss(0.0,  0.05), 3),
-            "az": round(random.gauss(9.81, 0.02), 3),
-            "gx": round(random.gauss(0.0,  0.01), 2),
-            "gy": round(random.gauss(0.0,  0.01), 2),
-            "gz": round(random.gauss(0.0,  0.01), 2),
-        }
-        robot_state["compass"] = {
-            "x": round(200 + 10 * math.sin(t * 0.1), 1),
-            "y": round( 50 + 10 * math.cos(t * 0.1), 1),
-            "z": round(-400 + random.gauss(0, 2),     1),
+            "ax": ax, "ay": ay, "az": az, "gx": gx, "gy": gy, "gz": gz,
         }
+        robot_state["compass"] = {"x": cx, "y": cy, "z": cz}
         robot_state["odom"] = {"linear": 0.0, "angular": 0.0}
         robot_state["rpm"]  = {"left":   0.0, "right":   0.0}
 
@@ -92,12 +170,15 @@ async def _serial_run(port: str):
     while True:
         try:
             reader, writer = await serial_asyncio.open_serial_connection(url=port, baudrate=115200)
-            print(f"[serial] connected on {port}")
+            log.info("[serial] connected on %s", port)
             while True:
-                # Drain outgoing command queue first
-                while not _cmd_q.empty():
-                    cmd = _cmd_q.get_nowait()
-                    writer.write(cmd.encode())
+                # Drain outgoing command queue first, as one write + drain
+                # for however many lines have queued up since the last pass.
+                if not _cmd_q.empty():
+                    pending = []
+                    while not _cmd_q.empty():
+                        pending.append(_cmd_q.get_nowait())
+                    writer.write(b"".join(pending))
                     await writer.drain()
                 # Read one sensor line (short timeout so commands aren't delayed)
                 try:
@@ -109,11 +190,11 @@ async def _serial_run(port: str):
                     pass
         except serial.SerialException as e:
             if "[Errno 2]" in str(e):
-                print(f"[serial] {port} not found - falling back to stub mode")
-                print(f"[serial] set SERIAL_PORT in .env and restart when Arduino is connected")
+                log.warning("[serial] %s not found - falling back to stub mode", port)
+                log.warning("[serial] set SERIAL_PORT in .env and restart when Arduino is connected")
                 await _stub_run()
                 return
-            print(f"[serial] {port} lost ({e}) - retrying in 5 s ...")
+            log.warning("[serial] %s lost (%s) - retrying in 5 s ...", port, e)
             await asyncio.sleep(5)
 
 
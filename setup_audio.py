@@ -11,8 +11,9 @@ Usage:
 """
 
 import contextlib
+import functools
 import os
-import re
+import shutil
 
 import numpy as np
 import sounddevice as sd
@@ -44,9 +45,27 @@ def _suppress_alsa_noise():
         os.close(saved_fd)
 
 
-def probe_output_rate(device_idx: int) -> int:
-    """Return the first sample rate ALSA will actually accept for output."""
-    for rate in COMMON_RATES:
+def _rates(first: int | None) -> list[int]:
+    """COMMON_RATES, with a previously accepted rate moved to the front."""
+    if first is None:
+        return COMMON_RATES
+    return [first] + [r for r in COMMON_RATES if r != first]
+
+
+def _saved_rate(idx_key: str, rate_key: str, device_idx: int) -> int | None:
+    """The rate saved in .env for `device_idx`, if it is the saved device."""
+    if get_current_index(idx_key) != device_idx:
+        return None
+    return get_current_index(rate_key)
+
+
+def probe_output_rate(device_idx: int, first: int | None = None) -> int:
+    """Return the first sample rate ALSA will actually accept for output.
+
+    `first` (the rate saved last time) is tried before COMMON_RATES, so a
+    re-run usually opens the device once instead of walking the list.
+    """
+    for rate in _rates(first):
         try:
             with _suppress_alsa_noise():
                 sd.check_output_settings(
@@ -61,9 +80,9 @@ def probe_output_rate(device_idx: int) -> int:
     )
 
 
-def probe_input_rate(device_idx: int) -> int:
+def probe_input_rate(device_idx: int, first: int | None = None) -> int:
     """Return the first sample rate ALSA will actually accept for input."""
-    for rate in COMMON_RATES:
+    for rate in _rates(first):
         try:
             with _suppress_alsa_noise():
                 sd.check_input_settings(
@@ -121,11 +140,24 @@ def pick_device(label: str, devices: list, default_idx: int | None) -> int:
 
 # ── Testing ───────────────────────────────────────────────────────────────────
 
+_rec_buf: np.ndarray | None = None
+
+
+def _rec_buffer(frames: int) -> np.ndarray:
+    """(frames, 1) float32 view of one recording buffer reused across retries."""
+    global _rec_buf
+    if _rec_buf is None or len(_rec_buf) < frames:
+        _rec_buf = np.empty((frames, 1), dtype="float32")
+    return _rec_buf[:frames]
+
+
 def test_mic(device_idx: int) -> tuple[bool, int]:
     """Record 2 s and report levels. Returns (ok, working_rate)."""
     print(f"\n[test] Probing input rates for device [{device_idx}] ...")
     try:
-        rate = probe_input_rate(device_idx)
+        rate = probe_input_rate(
+            device_idx, _saved_rate("MIC_DEVICE_INDEX", "MIC_SAMPLE_RATE", device_idx)
+        )
     except RuntimeError as e:
         print(f"  ERROR: {e}")
         return False, 0
@@ -134,11 +166,13 @@ def test_mic(device_idx: int) -> tuple[bool, int]:
     print(f"[test] Recording 2 seconds – speak or make noise now!")
     try:
         audio = sd.rec(
-            int(2 * rate), samplerate=rate, channels=1, dtype="float32", device=device_idx
+            samplerate=rate, channels=1, device=device_idx,
+            out=_rec_buffer(int(2 * rate)),
         )
         sd.wait()
-        avg  = float(np.abs(audio).mean())
-        peak = float(np.abs(audio).max())
+        np.abs(audio, out=audio)     # rectify in place: no temporaries
+        avg  = float(audio.mean())
+        peak = float(audio.max())
         bar  = "█" * min(int(peak * 50), 50)
         print(f"  avg={avg:.4f}  peak={peak:.4f}  |{bar:<50s}|")
         if peak < 0.001:
@@ -156,11 +190,23 @@ def test_mic(device_idx: int) -> tuple[bool, int]:
         return False, rate
 
 
+@functools.lru_cache(maxsize=None)
+def _tone(rate: int) -> np.ndarray:
+    """1 s, 440 Hz test tone at `rate`, built once per rate across retries."""
+    t    = np.linspace(0, 1, rate, dtype="float32")
+    tone = 0.3 * np.sin(2 * np.pi * 440 * t)
+    tone.flags.writeable = False
+    return tone
+
+
 def test_speaker(device_idx: int) -> tuple[bool, int]:
     """Play a 440 Hz tone. Returns (heard, working_rate)."""
     print(f"\n[test] Probing output rates for device [{device_idx}] ...")
     try:
-        rate = probe_output_rate(device_idx)
+        rate = probe_output_rate(
+            device_idx,
+            _saved_rate("SPEAKER_DEVICE_INDEX", "SPEAKER_SAMPLE_RATE", device_idx),
+        )
     except RuntimeError as e:
         print(f"  ERROR: {e}")
         return False, 0
@@ -168,9 +214,7 @@ def test_speaker(device_idx: int) -> tuple[bool, int]:
     print(f"  Using {rate} Hz")
     print(f"[test] Playing 440 Hz tone for 1 second ...")
     try:
-        t    = np.linspace(0, 1, rate, dtype="float32")
-        tone = 0.3 * np.sin(2 * np.pi * 440 * t)
-        sd.play(tone, samplerate=rate, device=device_idx)
+        sd.play(_tone(rate), samplerate=rate, device=device_idx)
         sd.wait()
         ans = input("  Did you hear the tone? [y/n]: ").strip().lower()
         return ans.startswith("y"), rate
@@ -181,39 +225,56 @@ def test_speaker(device_idx: int) -> tuple[bool, int]:
 
 # ── .env persistence ──────────────────────────────────────────────────────────
 
-def set_env_key(key: str, value: str):
-    """Write or update a key=value line in .env (creates the file if absent)."""
+def save_env(updates: dict[str, str]):
+    """Write or update key=value lines in .env (creates the file if absent).
+
+    One read and one write for all keys; comments, ordering and other keys
+    are kept.  The new file is swapped in with os.replace so an interrupted
+    run never leaves a half-written .env.
+    """
+    lines = []
     if os.path.exists(ENV_PATH):
         with open(ENV_PATH) as f:
-            content = f.read()
-    else:
-        content = ""
-
-    pattern  = rf"^{re.escape(key)}=.*$"
-    new_line = f"{key}={value}"
+            lines = f.read().splitlines()
+
+    seen = set()
+    for i, line in enumerate(lines):
+        key = line.split("=", 1)[0]
+        if "=" in line and key in updates:
+            lines[i] = f"{key}={updates[key]}"
+            seen.add(key)
+    lines += [f"{k}={v}" for k, v in updates.items() if k not in seen]
+
+    tmp = ENV_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    if os.path.exists(ENV_PATH):
+        shutil.copymode(ENV_PATH, tmp)
+    os.replace(tmp, ENV_PATH)
+    _env.cache_clear()
 
-    if re.search(pattern, content, flags=re.MULTILINE):
-        content = re.sub(pattern, new_line, content, flags=re.MULTILINE)
-    else:
-        content = content.rstrip("\n") + f"\n{new_line}\n"
+    for k, v in updates.items():
+        print(f"  saved  {k}={v}  →  .env")
 
-    with open(ENV_PATH, "w") as f:
-        f.write(content)
 
-    print(f"  saved  {new_line}  →  .env")
+@functools.lru_cache(maxsize=1)
+def _env() -> dict[str, str]:
+    """key → value for the KEY=value lines in .env, read once (save_env clears)."""
+    env = {}
+    if os.path.exists(ENV_PATH):
+        with open(ENV_PATH) as f:
+            for line in f:
+                key, sep, value = line.partition("=")
+                if sep:
+                    env.setdefault(key, value.strip())
+    return env
 
 
 def get_current_index(key: str) -> int | None:
-    if not os.path.exists(ENV_PATH):
+    try:
+        return int(_env()[key])
+    except (KeyError, ValueError):
         return None
-    with open(ENV_PATH) as f:
-        for line in f:
-            if line.startswith(f"{key}="):
-                try:
-                    return int(line.split("=", 1)[1].strip())
-                except ValueError:
-                    pass
-    return None
 
 
 # ── Main ──────────────────────────────────────────────────────────────────────
@@ -257,10 +318,12 @@ def main():
 
     # ── Save ──────────────────────────────────────────────────────────────────
     print("\n[save] Writing to .env ...")
-    set_env_key("MIC_DEVICE_INDEX",    str(mic_idx))
-    set_env_key("MIC_SAMPLE_RATE",     str(mic_rate))
-    set_env_key("SPEAKER_DEVICE_INDEX", str(spk_idx))
-    set_env_key("SPEAKER_SAMPLE_RATE",  str(spk_rate))
+    save_env({
+        "MIC_DEVICE_INDEX":     str(mic_idx),
+        "MIC_SAMPLE_RATE":      str(mic_rate),
+        "SPEAKER_DEVICE_INDEX": str(spk_idx),
+        "SPEAKER_SAMPLE_RATE":  str(spk_rate),
+    })
 
     print(f"\nDone!")
     print(f"  Mic:     [{mic_idx}] {mic_name}  @ {mic_rate} Hz")
@@ -2,8 +2,8 @@
 state_bus.py — thread-safe pub/sub bridge between robot pipeline and dashboard.
 
 Hot path  (~1 Hz per audio chunk):
-    Audio thread calls publish_audio_chunk() → SimpleQueue → async drainer
-    → WebSocket subscribers.
+    Audio thread calls publish_audio_chunk() → bounded deque → wakes async
+    drainer via loop.call_soon_threadsafe() → WebSocket subscribers.
 
 Cold path (polled by browser):
     pipeline() coroutine writes to pipeline_state dict directly (async-only).
@@ -13,23 +13,30 @@ Cold path (polled by browser):
 
 import asyncio
 import collections
-import queue
 import threading
 import time
 from typing import Callable, Set
 
 # ── Hot path: audio thread → async WebSocket ─────────────────────────────────
-# stdlib SimpleQueue is genuinely thread-safe; asyncio.Queue is NOT safe to
-# put() from a thread without loop.call_soon_threadsafe().
-_audio_q: queue.SimpleQueue = queue.SimpleQueue()
+# deque.append() / popleft() are atomic, which is all the single audio thread
+# and the single drainer need; maxlen makes a full queue drop its oldest
+# chunk.  asyncio.Queue is NOT safe to put() from a thread without
+# loop.call_soon_threadsafe().
+_audio_q: collections.deque = collections.deque(maxlen=20)
 _audio_subscribers: Set[Callable] = set()
 
+# Set (from the loop's own thread) whenever the queue may hold chunks, so the
+# drainer sleeps until there is work instead of polling.
+_audio_ready = asyncio.Event()
+_drainer_loop: asyncio.AbstractEventLoop | None = None
+
 
 def publish_audio_chunk(sim: float, state: str, peak: float) -> None:
     """Call from audio THREAD. Non-blocking; drops oldest if queue is full."""
     try:
-        if _audio_q.qsize() < 20:
-            _audio_q.put_nowait({"sim": sim, "state": state, "peak": peak})
+        _audio_q.append({"sim": sim, "state": state, "peak": peak})
+        if _drainer_loop is not None:
+            _drainer_loop.call_soon_threadsafe(_audio_ready.set)
     except Exception:
         pass
 
@@ -44,12 +51,15 @@ def unsubscribe_audio(cb: Callable) -> None:
 
 async def _audio_drainer() -> None:
     """Async task: drain queue, append to history, fan out to WS clients."""
+    global _drainer_loop
+    _drainer_loop = asyncio.get_running_loop()
     while True:
-        await asyncio.sleep(0.05)
+        await _audio_ready.wait()
+        _audio_ready.clear()
         while True:
             try:
-                payload = _audio_q.get_nowait()
-            except queue.Empty:
+                payload = _audio_q.popleft()
+            except IndexError:
                 break
             sim_history.append(payload)
             if _audio_subscribers:
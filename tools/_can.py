@@ -6,23 +6,25 @@ Set STUB_HARDWARE=1 in .env to print frames to console instead of
 sending real CAN messages - lets you test on Jetson without the robot wired up.
 """
 
+import logging
 import os
 
 STUB = os.getenv("STUB_HARDWARE", "0") == "1"
 
+log = logging.getLogger(__name__)
+
+# send() is bound once here for the mode we're in, so frames don't re-test
+# STUB or look up the bus / Message class as globals on every call.
 if STUB:
-    print("[tools] STUB mode - CAN disabled, commands print to console")
-    _bus = None
+    log.info("[tools] STUB mode - CAN disabled, commands print to console")
+
+    def send(arb_id: int, data: list[int]):
+        log.info("[CAN stub]  0x%03X  %s", arb_id, data)
 else:
     import can
     _bus = can.interface.Bus(
         channel=os.getenv("CAN_CHANNEL", "can0"), bustype="socketcan"
     )
 
-
-def send(arb_id: int, data: list[int]):
-    if STUB:
-        print(f"[CAN stub]  0x{arb_id:03X}  {data}")
-        return
-    msg = can.Message(arbitration_id=arb_id, data=data, is_extended_id=False)
-    _bus.send(msg)
+    def send(arb_id: int, data: list[int], _send=_bus.send, _Message=can.Message):
+        _send(_Message(arbitration_id=arb_id, data=data, is_extended_id=False))
@@ -19,6 +19,11 @@ import serial_reader
 
 EMOTIONS = {"idle": 0, "happy": 1, "thinking": 2, "sad": 3, "angry": 4}
 
+# Serial frame per emotion, encoded once at import.
+EMOTION_CMDS = {
+    name: f"CMD,EMOTION,{code}\n".encode() for name, code in EMOTIONS.items()
+}
+
 
 @tool
 def set_emotion(emotion: str) -> str:
@@ -26,9 +31,9 @@ def set_emotion(emotion: str) -> str:
     Set the robot's LED emotion.
     Options: idle, happy, thinking, sad, angry
     """
-    code = EMOTIONS.get(emotion)
-    if code is None:
+    cmd = EMOTION_CMDS.get(emotion)
+    if cmd is None:
         return f"unknown emotion '{emotion}'. options: {list(EMOTIONS)}"
-    serial_reader.send_command(f"CMD,EMOTION,{code}")
+    serial_reader.send_command(cmd)
     state_bus.set_current_emotion(emotion)
     return f"emotion={emotion}"
@@ -7,31 +7,52 @@ Serial protocol (USB to Arduino):
   CMD,DRIVE,0,0                              — stop
 """
 
-import time
+import asyncio
 
 from strands import tool
 
 import serial_reader
 
+RESEND_S    = 0.05   # well inside the firmware's 200 ms command watchdog
+MAX_DRIVE_S = 10.0   # longest single drive_for(); longer requests are clamped
+
 
 @tool
-def drive_for(throttle: float, steering: float, seconds: float) -> str:
+async def drive_for(throttle: float, steering: float, seconds: float) -> str:
     """
     Drive the robot for a set duration, then stop automatically.
     throttle: -1.0 (full reverse) to 1.0 (full forward)
     steering: -1.0 (full left)   to 1.0 (full right)
-    seconds:  how long to drive before stopping
+    seconds:  how long to drive before stopping (at most 10)
     """
-    t = max(-100, min(100, int(throttle * 100)))
-    s = max(-100, min(100, int(steering * 100)))
-    serial_reader.send_command(f"CMD,DRIVE,{t},{s}")
-    time.sleep(max(0.0, seconds))
-    serial_reader.send_command("CMD,DRIVE,0,0")
+    # Awaited on the event loop (no worker thread parked in time.sleep) and
+    # timed against the loop's monotonic clock from before the first send.
+    # The Arduino zeroes the motors CMD_TIMEOUT_MS (200 ms) after the last
+    # command, so the drive line is resent every RESEND_S until the deadline,
+    # unless a stop (stop() tool or dashboard) arrives first.  The finally
+    # sends CMD_STOP even if the task is cancelled mid-drive.
+    loop     = asyncio.get_running_loop()
+    seconds  = min(max(0.0, seconds), MAX_DRIVE_S)
+    deadline = loop.time() + seconds
+    cmd      = serial_reader.drive_command(throttle, steering)
+    gen      = serial_reader.stop_gen
+    try:
+        while True:
+            if serial_reader.stop_gen != gen:
+                return (f"drive throttle={throttle:.2f} steering={steering:.2f} "
+                        f"interrupted by stop")
+            serial_reader.send_command(cmd)
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(RESEND_S, remaining))
+    finally:
+        serial_reader.send_command(serial_reader.CMD_STOP)
     return f"drove throttle={throttle:.2f} steering={steering:.2f} for {seconds}s"
 
 
 @tool
 def stop() -> str:
     """Stop all motors immediately."""
-    serial_reader.send_command("CMD,DRIVE,0,0")
+    serial_reader.stop_motors()
     return "stopped"
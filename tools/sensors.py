@@ -6,15 +6,31 @@ robot_state is populated at 10 Hz by serial_reader.py from the Arduino's
 $IMU / $CMP / $ODO / $RPM / $LDR telemetry lines.
 """
 
+import json
+import time
+
 from strands import tool
 
 from serial_reader import robot_state
 
+# The tool returns robot_state serialised to JSON once per snapshot, so the
+# planner sees one consistent set of readings even while the serial reader
+# rebinds groups.  Calls within one snapshot's lifetime (well under the
+# 100 ms telemetry period) share the same string instead of encoding again.
+_SNAPSHOT_TTL = 0.05
+_snapshot     = "{}"
+_snapshot_t   = float("-inf")
+
 
 @tool
-def get_sensors() -> dict:
+def get_sensors() -> str:
     """
-    Return the latest sensor readings from the robot:
+    Return the latest sensor readings from the robot as JSON:
     IMU (accel + gyro), compass, odometry (linear/angular velocity), wheel RPM.
     """
-    return robot_state
+    global _snapshot, _snapshot_t
+    now = time.monotonic()
+    if now - _snapshot_t >= _SNAPSHOT_TTL:
+        _snapshot   = json.dumps(robot_state, separators=(",", ":"))
+        _snapshot_t = now
+    return _snapshot
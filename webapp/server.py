@@ -56,27 +56,25 @@ async def api_stop_listen():
 @app.post("/api/drive")
 async def api_drive(request: Request):
     body = await request.json()
-    t = max(-1.0, min(1.0, float(body.get("throttle", 0))))
-    s = max(-1.0, min(1.0, float(body.get("steering", 0))))
-    ti = max(-100, min(100, int(t * 100)))
-    si = max(-100, min(100, int(s * 100)))
-    serial_reader.send_command(f"CMD,DRIVE,{ti},{si}")
+    serial_reader.send_command(serial_reader.drive_command(
+        float(body.get("throttle", 0)), float(body.get("steering", 0))
+    ))
     return JSONResponse({"ok": True})
 
 
 @app.post("/api/stop")
 async def api_stop():
-    serial_reader.send_command("CMD,DRIVE,0,0")
+    serial_reader.stop_motors()
     return JSONResponse({"ok": True})
 
 
 @app.post("/api/emotion/{name}")
 async def api_emotion(name: str):
     import tools.emotion as em
-    code = em.EMOTIONS.get(name)
-    if code is None:
+    cmd = em.EMOTION_CMDS.get(name)
+    if cmd is None:
         return JSONResponse({"error": f"unknown emotion '{name}'"}, status_code=400)
-    serial_reader.send_command(f"CMD,EMOTION,{code}")
+    serial_reader.send_command(cmd)
     state_bus.set_current_emotion(name)
     return JSONResponse({"ok": True})
 